@@ -0,0 +1,176 @@
+from dataclasses import asdict
+import hmac
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+
+from ..core.config import get_settings, Settings
+from ..core.profiling import (
+    StackSampler,
+    arm_requests,
+    begin_profile,
+    configure_profile_store,
+    end_profile,
+    get_continuous,
+    get_profile,
+    get_startup_phases,
+    import_timer,
+    list_profiles,
+    reset_request_sampler,
+    set_request_sampler,
+    start_continuous,
+    stop_continuous,
+    store_profile,
+    track_thread,
+)
+
+PROFILING_PREFIX = "/api/admin/profiling"
+
+
+class ProfiledRoute(APIRoute):
+    """Route whose endpoint registers its thread with the request sampler."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, track_thread(endpoint), **kwargs)
+
+
+def token_matches(settings: Settings, value: Optional[str]) -> bool:
+    """Compare `value` with the profiling token; without a token nothing matches."""
+    if not settings.profiling_token or value is None:
+        return False
+    return hmac.compare_digest(value.encode(), settings.profiling_token.encode())
+
+
+def require_profiling_access(request: Request, settings: Settings = Depends(get_settings)) -> None:
+    if not settings.profiling_token:
+        raise HTTPException(status_code=403, detail="profiling_token is not configured")
+    if not token_matches(settings, request.headers.get(settings.profiling_header)):
+        raise HTTPException(status_code=403, detail="invalid profiling token")
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_access)])
+
+
+def install_profiling(app: FastAPI, settings: Settings) -> None:
+    """
+    Add the request profiling middleware and the admin router to `app`.
+
+    Nothing is mounted unless profiling is enabled, and both the header
+    trigger and the admin router require `profiling_token`.
+    """
+    if not settings.profiling_enabled:
+        return
+    configure_profile_store(settings.profiling_max_profiles)
+    app.include_router(router, prefix=PROFILING_PREFIX, tags=["profiling"])
+
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        if request.url.path.startswith(PROFILING_PREFIX):
+            return await call_next(request)
+
+        requested = token_matches(settings, request.headers.get(settings.profiling_header))
+        if not begin_profile(
+            requested, settings.profiling_max_concurrent, settings.profiling_min_interval_s
+        ):
+            return await call_next(request)
+
+        try:
+            sampler = StackSampler(settings.profiling_interval_ms, thread_ids=set()).start()
+            token = set_request_sampler(sampler)
+            start = time.perf_counter()
+            try:
+                response = await call_next(request)
+            finally:
+                reset_request_sampler(token)
+                sampler.stop()
+        finally:
+            end_profile()
+        duration_ms = (time.perf_counter() - start) * 1000
+        profile = store_profile(
+            sampler, request.method, request.url.path, duration_ms, response.status_code
+        )
+        response.headers["X-Profile-Id"] = str(profile.id)
+        return response
+
+
+def sampler_info(sampler) -> dict:
+    if sampler is None:
+        return {"running": False, "sample_count": 0}
+    return {
+        "running": sampler.running,
+        "interval_ms": sampler.interval_s * 1000,
+        "duration_s": sampler.duration_s,
+        "started_at": sampler.started_at,
+        "stopped_at": sampler.stopped_at,
+        "sample_count": sampler.sample_count(),
+    }
+
+
+@router.post("/arm")
+def arm(count: int = Query(1, ge=0, le=1000)):
+    """Profile the next `count` requests (0 disarms)."""
+    return {"armed": arm_requests(count)}
+
+
+@router.get("/profiles")
+def get_profiles():
+    """
+    List stored profiles. `duration_ms` covers the whole request while only
+    the endpoint call (`endpoint_ms`) is sampled; dependencies, validation
+    and response serialization are not.
+    """
+    return [
+        {k: v for k, v in asdict(p).items() if k != "folded"}
+        for p in list_profiles()
+    ]
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: int):
+    """Return the profile in folded-stack format, ready for flamegraph.pl or speedscope."""
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    return profile.folded
+
+
+@router.post("/sampler/start")
+def sampler_start(
+    duration_s: float = Query(60.0, gt=0, le=3600),
+    interval_ms: Optional[float] = Query(None, ge=10, le=10000),
+    settings: Settings = Depends(get_settings),
+):
+    sampler = start_continuous(interval_ms or settings.profiling_continuous_interval_ms, duration_s)
+    return sampler_info(sampler)
+
+
+@router.post("/sampler/stop")
+def sampler_stop():
+    return sampler_info(stop_continuous())
+
+
+@router.get("/sampler")
+def sampler_status():
+    return sampler_info(get_continuous())
+
+
+@router.get("/sampler/folded", response_class=PlainTextResponse)
+def sampler_folded():
+    sampler = get_continuous()
+    if sampler is None:
+        raise HTTPException(status_code=404, detail="sampler has not been started")
+    return sampler.folded()
+
+
+@router.get("/startup")
+def startup_report(top: int = Query(50, ge=1, le=5000)):
+    """Import time per module (slowest self time first) and model load time."""
+    timings = import_timer.report()
+    return {
+        "phases_ms": get_startup_phases(),
+        "imports_total_ms": sum(t.self_ms for t in timings),
+        "imports": [asdict(t) for t in timings[:top]],
+    }
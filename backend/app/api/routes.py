@@ -8,6 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from ..core.config import get_settings, Settings
 from ..core.version import MODEL_VERSION
 from ..dependencies import get_model_service
+from .profiling import ProfiledRoute
 from ..schemas import (
     BatchIn,
     BatchOut,
@@ -20,7 +21,7 @@ from ..schemas import (
 from ..services.features import to_features, vectorize
 from ml.model_service import ModelService
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 ROOT_DIR = Path(__file__).resolve().parents[3]
 PAYSIM_PATH = ROOT_DIR / "data" / "raw" / "paysim.csv"
 MAX_TX_LIMIT = 500
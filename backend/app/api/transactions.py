@@ -7,9 +7,10 @@ from functools import lru_cache
 
 from ..dependencies import get_model_service
 from ..core.metrics import get_latency_stats
+from .profiling import ProfiledRoute
 from ml.model_service import ModelService
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 CSV_PATH = Path(__file__).resolve().parents[3] / "data" / "raw" / "paysim.csv"
 
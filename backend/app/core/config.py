@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -25,6 +25,17 @@ class Settings(BaseSettings):
         default_factory=lambda: str(ML_ARTIFACTS_DIR / "feature_order.json")
     )
     decision_threshold: float = 0.5
+    # On-demand profiling (opt-in): send the token in the header on a request (or
+    # arm requests via /api/admin/profiling) to capture a folded-stack profile of
+    # it. Without a token the header trigger and the admin endpoints are refused.
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Profile"
+    profiling_token: Optional[str] = None
+    profiling_interval_ms: float = 5.0
+    profiling_max_profiles: int = 20
+    profiling_max_concurrent: int = 1
+    profiling_min_interval_s: float = 1.0
+    profiling_continuous_interval_ms: float = 100.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+import asyncio
+import builtins
+import functools
+import importlib.util
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set
+
+
+# --- Stack sampler --------------------------------------------------------
+
+
+def _fold_stack(frame) -> str:
+    """Render a frame chain as a root-first `module:function;...` string."""
+    parts: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        parts.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+class StackSampler:
+    """
+    Sample Python stacks at a fixed interval.
+
+    With `thread_ids` set, only those threads are sampled (threads can be
+    added while running); otherwise every thread except the samplers is.
+    Samples are aggregated in the "folded" format (`frame;frame;frame count`)
+    understood by flamegraph.pl, speedscope and most flame graph viewers.
+    """
+
+    thread_name = "stack-sampler"
+
+    def __init__(
+        self,
+        interval_ms: float,
+        duration_s: Optional[float] = None,
+        thread_ids: Optional[Set[int]] = None,
+    ):
+        self.interval_s = max(interval_ms, 0.1) / 1000
+        self.duration_s = duration_s
+        self.thread_ids = thread_ids
+        self.samples: Counter = Counter()
+        self.tracked_ms = 0.0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_thread(self, thread_id: int) -> None:
+        with self._lock:
+            if self.thread_ids is not None:
+                self.thread_ids.add(thread_id)
+
+    def discard_thread(self, thread_id: int, tracked_ms: float = 0.0) -> None:
+        """Stop sampling `thread_id`, adding the time it was tracked to `tracked_ms`."""
+        with self._lock:
+            if self.thread_ids is not None:
+                self.thread_ids.discard(thread_id)
+            self.tracked_ms += tracked_ms
+
+    def start(self) -> "StackSampler":
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self
+
+    def _run(self) -> None:
+        names = {}
+        deadline = None
+        if self.duration_s is not None:
+            deadline = time.monotonic() + self.duration_s
+        while not self._stop.wait(self.interval_s):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            with self._lock:
+                targets = None if self.thread_ids is None else set(self.thread_ids)
+            if targets is not None and not targets:
+                continue
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    thread_name = names.get(thread_id, str(thread_id))
+                    if targets is not None:
+                        if thread_id not in targets:
+                            continue
+                    elif thread_name == self.thread_name:
+                        continue
+                    self.samples[f"{thread_name};{_fold_stack(frame)}"] += 1
+            del frames
+        self.stopped_at = time.time()
+
+    def folded(self) -> str:
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def sample_count(self) -> int:
+        with self._lock:
+            return sum(self.samples.values())
+
+
+# --- Per-request profiles -------------------------------------------------
+
+
+@dataclass
+class RequestProfile:
+    """
+    A stored request profile.
+
+    `duration_ms` is the whole request as seen by the middleware. Only the
+    endpoint call itself is sampled and `endpoint_ms` is the time spent in it;
+    dependencies (e.g. `get_model_service`), request parsing, response
+    validation and serialization make up the difference and are not sampled.
+    """
+
+    id: int
+    method: str
+    path: str
+    created_at: float
+    duration_ms: float
+    endpoint_ms: float
+    status_code: int
+    sample_count: int
+    folded: str = field(repr=False)
+
+
+_lock = threading.Lock()
+_ids = itertools.count(1)
+# Unbounded until configure_profile_store() applies `profiling_max_profiles`
+_profiles: Deque[RequestProfile] = deque()
+_armed = 0
+_active = 0
+_last_requested_at = float("-inf")
+_continuous: Optional[StackSampler] = None
+_request_sampler: ContextVar[Optional[StackSampler]] = ContextVar("request_sampler", default=None)
+
+
+def configure_profile_store(max_profiles: int) -> None:
+    global _profiles
+    with _lock:
+        _profiles = deque(_profiles, maxlen=max(1, max_profiles))
+
+
+def arm_requests(count: int) -> int:
+    """Profile the next `count` requests regardless of headers."""
+    global _armed
+    with _lock:
+        _armed = max(0, count)
+        return _armed
+
+
+def get_armed() -> int:
+    with _lock:
+        return _armed
+
+
+def begin_profile(requested: bool, max_concurrent: int, min_interval_s: float) -> bool:
+    """
+    Decide whether to profile a request and, if so, reserve a profiling slot.
+
+    At most `max_concurrent` requests are profiled at once, and header
+    requested profiles are limited to one per `min_interval_s`; armed
+    requests only count against the concurrency cap. Pair with `end_profile`.
+    """
+    global _armed, _active, _last_requested_at
+    with _lock:
+        if _active >= max_concurrent:
+            return False
+        now = time.monotonic()
+        if requested and now - _last_requested_at >= min_interval_s:
+            _last_requested_at = now
+        elif _armed > 0:
+            _armed -= 1
+        else:
+            return False
+        _active += 1
+        return True
+
+
+def end_profile() -> None:
+    global _active
+    with _lock:
+        _active = max(0, _active - 1)
+
+
+def set_request_sampler(sampler: Optional[StackSampler]):
+    """Expose `sampler` to code running in the current request's context."""
+    return _request_sampler.set(sampler)
+
+
+def reset_request_sampler(token) -> None:
+    _request_sampler.reset(token)
+
+
+def track_thread(func):
+    """
+    Wrap an endpoint so the request sampler only samples the thread running it.
+
+    Sync endpoints run on worker threads; the request's context (and with it
+    the sampler) is copied there, so the wrapper registers that thread for
+    the duration of the call and adds the call's time to `tracked_ms`.
+    """
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            sampler = _request_sampler.get()
+            if sampler is None:
+                return await func(*args, **kwargs)
+            thread_id = threading.get_ident()
+            sampler.add_thread(thread_id)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                sampler.discard_thread(thread_id, (time.perf_counter() - start) * 1000)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        sampler = _request_sampler.get()
+        if sampler is None:
+            return func(*args, **kwargs)
+        thread_id = threading.get_ident()
+        sampler.add_thread(thread_id)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sampler.discard_thread(thread_id, (time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+def store_profile(
+    sampler: StackSampler, method: str, path: str, duration_ms: float, status_code: int
+) -> RequestProfile:
+    profile = RequestProfile(
+        id=next(_ids),
+        method=method,
+        path=path,
+        created_at=sampler.started_at or time.time(),
+        duration_ms=duration_ms,
+        endpoint_ms=sampler.tracked_ms,
+        status_code=status_code,
+        sample_count=sampler.sample_count(),
+        folded=sampler.folded(),
+    )
+    with _lock:
+        _profiles.append(profile)
+    return profile
+
+
+def list_profiles() -> List[RequestProfile]:
+    with _lock:
+        return list(reversed(_profiles))
+
+
+def get_profile(profile_id: int) -> Optional[RequestProfile]:
+    with _lock:
+        for profile in _profiles:
+            if profile.id == profile_id:
+                return profile
+    return None
+
+
+# --- Continuous low-rate sampler ------------------------------------------
+
+
+def start_continuous(interval_ms: float, duration_s: float) -> StackSampler:
+    """Start a window of low-rate sampling, replacing any previous window."""
+    global _continuous
+    with _lock:
+        previous = _continuous
+        _continuous = StackSampler(interval_ms, duration_s=duration_s)
+        sampler = _continuous
+    if previous is not None:
+        previous.stop()
+    return sampler.start()
+
+
+def stop_continuous() -> Optional[StackSampler]:
+    with _lock:
+        sampler = _continuous
+    if sampler is not None:
+        sampler.stop()
+    return sampler
+
+
+def get_continuous() -> Optional[StackSampler]:
+    with _lock:
+        return _continuous
+
+
+# --- Startup report -------------------------------------------------------
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    cumulative_ms: float
+    self_ms: float
+
+
+class ImportTimer:
+    """
+    Time first-time imports by wrapping `builtins.__import__`.
+
+    Each import statement that loads new modules gets its cumulative time and
+    its self time (cumulative minus nested import statements). Submodules
+    loaded through the fromlist (`from pkg import sub`) are reported by their
+    full name; when one statement loads several modules they share one entry
+    keyed by the comma-separated names.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, ImportTiming] = {}
+        self._original = builtins.__import__
+        self._installed = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Bound once so `builtins.__import__ is self._hook` identity checks hold
+        self._hook = self._import
+
+    @property
+    def installed(self) -> bool:
+        return self._installed
+
+    def install(self) -> None:
+        if self._installed:
+            return
+        if builtins.__import__ is not self._hook:
+            self._original = builtins.__import__
+            builtins.__import__ = self._hook
+        self._installed = True
+
+    def uninstall(self) -> None:
+        """
+        Stop timing imports. The original `__import__` is only restored when
+        ours is still the outermost hook; otherwise the wrapper stays in the
+        chain as a pass-through so later hooks are not clobbered.
+        """
+        if not self._installed:
+            return
+        if builtins.__import__ is self._hook:
+            builtins.__import__ = self._original
+        self._installed = False
+
+    def _pending(self, name, globals, fromlist, level) -> List[str]:
+        resolved = name
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                resolved = importlib.util.resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                resolved = name
+        if resolved not in sys.modules:
+            return [resolved]
+        module = sys.modules[resolved]
+        return [
+            f"{resolved}.{item}"
+            for item in fromlist or ()
+            if item != "*"
+            and not hasattr(module, item)
+            and f"{resolved}.{item}" not in sys.modules
+        ]
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original
+        if not self._installed:
+            return original(name, globals, locals, fromlist, level)
+        pending = self._pending(name, globals, fromlist, level)
+        if not pending:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            children_ms = stack.pop()
+            if stack:
+                stack[-1] += elapsed_ms
+            loaded = [module for module in pending if module in sys.modules]
+            if loaded:
+                key = ", ".join(loaded)
+                with self._lock:
+                    self.timings.setdefault(
+                        key,
+                        ImportTiming(
+                            module=key,
+                            cumulative_ms=elapsed_ms,
+                            self_ms=max(elapsed_ms - children_ms, 0.0),
+                        ),
+                    )
+
+    def report(self) -> List[ImportTiming]:
+        with self._lock:
+            return sorted(self.timings.values(), key=lambda t: t.self_ms, reverse=True)
+
+
+import_timer = ImportTimer()
+_startup_phases: Dict[str, float] = {}
+
+
+def record_startup_phase(name: str, duration_ms: float) -> None:
+    with _lock:
+        _startup_phases[name] = duration_ms
+
+
+def get_startup_phases() -> Dict[str, float]:
+    with _lock:
+        return dict(_startup_phases)
@@ -1,3 +1,4 @@
+import time
 from typing import Optional
 
 from fastapi import Depends
@@ -5,6 +6,7 @@ from fastapi import Depends
 from ml.model_service import ModelService
 
 from .core.config import Settings, get_settings
+from .core.profiling import record_startup_phase
 
 _model_service: Optional[ModelService] = None
 
@@ -21,5 +23,7 @@ def get_model_service(settings: Settings = Depends(get_settings)) -> ModelServic
             feature_order_path=settings.feature_order_path,
             decision_threshold=settings.decision_threshold,
         )
+        start = time.perf_counter()
         _model_service.load()
+        record_startup_phase("model_load", (time.perf_counter() - start) * 1000)
     return _model_service
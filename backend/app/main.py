@@ -6,16 +6,24 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
+from .core.config import get_settings
+from .core.profiling import import_timer
+
+# Time every module imported from here on (config and pydantic are already
+# loaded); the report is served at /api/admin/profiling/startup
+if get_settings().profiling_enabled:
+    import_timer.install()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import time
 
 from app.api.transactions import router as transactions_router
 from .api.routes import router as api_router
-from .core.config import get_settings
 from .core.version import MODEL_VERSION
 from .dependencies import get_model_service
 from .core.metrics import record_latency
+from .api.profiling import install_profiling
 
 
 def create_app() -> FastAPI:
@@ -34,6 +42,8 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    install_profiling(app, settings)
+
     @app.middleware("http")
     async def track_latency(request, call_next):
         start = time.perf_counter()
@@ -48,6 +58,8 @@ def create_app() -> FastAPI:
     def startup():
         # Prime the model in memory at startup
         get_model_service(get_settings())
+        # Imports after startup are lazy one-offs; stop paying for the wrapper
+        import_timer.uninstall()
 
     return app
 
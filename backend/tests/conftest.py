@@ -0,0 +1,7 @@
+from pathlib import Path
+import sys
+
+# Mirror app/main.py: the project root must be importable for the `ml` package
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
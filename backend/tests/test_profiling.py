@@ -0,0 +1,221 @@
+import builtins
+import sys
+import time
+from collections import deque
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.profiling import PROFILING_PREFIX, ProfiledRoute, install_profiling
+from app.core import profiling
+from app.core.config import Settings, get_settings
+
+
+TOKEN = {"X-Profile": "s3cret"}
+
+
+def busy_endpoint():
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return {"ok": True}
+
+
+@pytest.fixture(autouse=True)
+def reset_profiling_state(monkeypatch):
+    monkeypatch.setattr(profiling, "_profiles", deque())
+    monkeypatch.setattr(profiling, "_active", 0)
+    monkeypatch.setattr(profiling, "_last_requested_at", float("-inf"))
+    profiling.arm_requests(0)
+    yield
+    profiling.arm_requests(0)
+    profiling.stop_continuous()
+    monkeypatch.setattr(profiling, "_continuous", None)
+
+
+def make_client(**overrides) -> TestClient:
+    settings = Settings(
+        **{
+            "profiling_enabled": True,
+            "profiling_token": "s3cret",
+            "profiling_min_interval_s": 0.0,
+            **overrides,
+        }
+    )
+    app = FastAPI()
+    app.dependency_overrides[get_settings] = lambda: settings
+    install_profiling(app, settings)
+    router = APIRouter(route_class=ProfiledRoute)
+    router.add_api_route("/busy", busy_endpoint)
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_header_trigger_profiles_only_the_endpoint_thread():
+    client = make_client()
+    response = client.get("/busy", headers=TOKEN)
+
+    profile_id = int(response.headers["X-Profile-Id"])
+    profile = profiling.get_profile(profile_id)
+    assert profile is not None and profile.path == "/busy"
+    assert profile.sample_count > 0
+    assert 100 <= profile.endpoint_ms <= profile.duration_ms
+    assert all("busy_endpoint" in line for line in profile.folded.splitlines())
+
+
+def test_unrequested_requests_are_not_profiled():
+    client = make_client()
+    response = client.get("/busy")
+    assert "X-Profile-Id" not in response.headers
+    assert profiling.list_profiles() == []
+
+
+def test_disabled_profiling_ignores_header_and_hides_admin_router():
+    client = make_client(profiling_enabled=False)
+    assert "X-Profile-Id" not in client.get("/busy", headers=TOKEN).headers
+    assert client.get(f"{PROFILING_PREFIX}/profiles", headers=TOKEN).status_code == 404
+    assert not any(path.startswith(PROFILING_PREFIX) for path in client.app.openapi()["paths"])
+
+
+def test_enabled_without_token_refuses_admin_router_and_header_trigger():
+    client = make_client(profiling_token=None)
+    for headers in ({}, {"X-Profile": "1"}, {"X-Profile": ""}):
+        assert client.post(f"{PROFILING_PREFIX}/arm", headers=headers).status_code == 403
+        assert client.post(
+            f"{PROFILING_PREFIX}/sampler/start", headers=headers
+        ).status_code == 403
+        assert "X-Profile-Id" not in client.get("/busy", headers=headers).headers
+    assert profiling.get_armed() == 0
+    assert profiling.get_continuous() is None
+
+
+def test_token_gates_admin_router_and_header_trigger():
+    client = make_client(profiling_token="s3cret")
+    assert client.get(f"{PROFILING_PREFIX}/profiles").status_code == 403
+    bad = {"X-Profile": "wrong"}
+    assert client.get(f"{PROFILING_PREFIX}/profiles", headers=bad).status_code == 403
+    assert "X-Profile-Id" not in client.get("/busy", headers=bad).headers
+
+    assert client.get(f"{PROFILING_PREFIX}/profiles", headers=TOKEN).status_code == 200
+    assert "X-Profile-Id" in client.get("/busy", headers=TOKEN).headers
+
+
+def test_arm_profiles_next_requests_then_disarms():
+    client = make_client()
+    armed = client.post(f"{PROFILING_PREFIX}/arm", params={"count": 2}, headers=TOKEN)
+    assert armed.json() == {"armed": 2}
+
+    assert "X-Profile-Id" in client.get("/busy").headers
+    assert profiling.get_armed() == 1
+    assert "X-Profile-Id" in client.get("/busy").headers
+    assert profiling.get_armed() == 0
+    assert "X-Profile-Id" not in client.get("/busy").headers
+
+    client.post(f"{PROFILING_PREFIX}/arm", params={"count": 3}, headers=TOKEN)
+    disarmed = client.post(f"{PROFILING_PREFIX}/arm", params={"count": 0}, headers=TOKEN)
+    assert disarmed.json() == {"armed": 0}
+    assert "X-Profile-Id" not in client.get("/busy").headers
+
+
+def test_concurrency_cap_and_header_rate_limit():
+    assert profiling.begin_profile(True, max_concurrent=1, min_interval_s=0)
+    assert not profiling.begin_profile(True, max_concurrent=1, min_interval_s=0)
+    profiling.end_profile()
+
+    assert not profiling.begin_profile(True, max_concurrent=1, min_interval_s=60)
+    profiling.arm_requests(1)
+    assert profiling.begin_profile(True, max_concurrent=1, min_interval_s=60)
+    profiling.end_profile()
+
+
+def test_bounded_store_evicts_oldest_profiles():
+    profiling.configure_profile_store(2)
+    sampler = profiling.StackSampler(5)
+    ids = [profiling.store_profile(sampler, "GET", "/x", 1.0, 200).id for _ in range(3)]
+
+    assert [p.id for p in profiling.list_profiles()] == [ids[2], ids[1]]
+    assert profiling.get_profile(ids[0]) is None
+
+
+def test_continuous_sampler_rejects_high_rate_intervals():
+    client = make_client()
+    start = f"{PROFILING_PREFIX}/sampler/start"
+    assert client.post(start, params={"interval_ms": 1}, headers=TOKEN).status_code == 422
+    assert profiling.get_continuous() is None
+
+
+def test_continuous_sampler_stops_after_duration():
+    sampler = profiling.start_continuous(interval_ms=5, duration_s=0.1)
+    assert sampler.running
+    time.sleep(0.3)
+
+    assert not sampler.running
+    assert sampler.stopped_at is not None
+    assert sampler.sample_count() > 0
+    assert "stack-sampler" not in sampler.folded()
+
+
+@pytest.fixture
+def module_dir(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    names = ("timed_outer", "timed_inner", "timed_pkg", "timed_pkg.sub")
+    yield tmp_path
+    for name in names:
+        sys.modules.pop(name, None)
+
+
+def test_import_timer_accounts_nested_imports(module_dir):
+    (module_dir / "timed_inner.py").write_text("import time\ntime.sleep(0.05)\n")
+    (module_dir / "timed_outer.py").write_text(
+        "import time\nimport timed_inner\ntime.sleep(0.03)\n"
+    )
+    timer = profiling.ImportTimer()
+    timer.install()
+    try:
+        import timed_outer  # noqa: F401
+    finally:
+        timer.uninstall()
+
+    inner = timer.timings["timed_inner"]
+    outer = timer.timings["timed_outer"]
+    assert inner.self_ms == pytest.approx(inner.cumulative_ms)
+    assert inner.cumulative_ms >= 50
+    assert outer.cumulative_ms >= inner.cumulative_ms + 30
+    assert outer.self_ms == pytest.approx(outer.cumulative_ms - inner.cumulative_ms)
+
+
+def test_import_timer_records_fromlist_submodules(module_dir):
+    package = module_dir / "timed_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "sub.py").write_text("import time\ntime.sleep(0.02)\n")
+    import timed_pkg  # noqa: F401
+
+    timer = profiling.ImportTimer()
+    timer.install()
+    try:
+        from timed_pkg import sub  # noqa: F401
+    finally:
+        timer.uninstall()
+
+    assert timer.timings["timed_pkg.sub"].cumulative_ms >= 20
+
+
+def test_import_timer_uninstall_keeps_later_hooks():
+    timer = profiling.ImportTimer()
+    original = builtins.__import__
+    timer.install()
+    later_hook = lambda *args, **kwargs: timer._hook(*args, **kwargs)  # noqa: E731
+    builtins.__import__ = later_hook
+    try:
+        timer.uninstall()
+        assert builtins.__import__ is later_hook
+        import json  # noqa: F401  (pass-through still works)
+    finally:
+        builtins.__import__ = original
+    assert not timer.installed
+
+    timer.install()
+    timer.uninstall()
+    assert builtins.__import__ is original